@@ -4,6 +4,7 @@ import json
 import os
 from dotenv import load_dotenv
 from matcher import RegretMatcher
+from pattern_store import PatternStore
 from scraper import RedditScraper
 from pattern_extractor import PatternExtractor
 
@@ -17,10 +18,10 @@ CORS(app)
 matcher = None
 
 def init_matcher():
-    """Initialize matcher if patterns file exists"""
+    """Initialize matcher if patterns file or shards exist"""
     global matcher
     patterns_file = '../data/regret_patterns.json'
-    if os.path.exists(patterns_file):
+    if PatternStore(patterns_file).exists():
         try:
             matcher = RegretMatcher(patterns_file)
             print("Matcher initialized successfully")
@@ -182,8 +183,11 @@ def trigger_extraction():
         patterns = extractor.extract_patterns_batch(data['posts'][:limit])
         filename = extractor.save_patterns(patterns)
         
-        # Reinitialize matcher with new patterns
-        init_matcher()
+        # Reload shards in place, or initialize matcher if not loaded yet
+        if matcher:
+            matcher.reload()
+        else:
+            init_matcher()
         
         return jsonify({
             'success': True,
@@ -1,60 +1,114 @@
+import heapq
 import json
 import os
 from gemini_client import GeminiClient
+from pattern_store import PatternStore, normalize_category
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def score_pattern(pattern, user_age, decision_category, context_words):
+    """Relevance score of a single pattern for the user's situation"""
+    score = 0
+    
+    # Age similarity (within 10 years)
+    if pattern.get('age_when_decided'):
+        age_diff = abs(pattern['age_when_decided'] - user_age)
+        if age_diff <= 10:
+            score += (10 - age_diff) * 2
+    
+    # Category match
+    if pattern.get('decision_category') == decision_category:
+        score += 20
+    
+    # Context similarity (simple keyword matching)
+    if context_words:
+        pattern_context = pattern.get('situation_context', '').lower()
+        common_words = context_words & set(pattern_context.split())
+        score += len(common_words)
+    
+    # Higher severity patterns are more relevant
+    if pattern.get('regret_severity'):
+        score += pattern['regret_severity']
+    
+    return score
+
 class RegretMatcher:
     def __init__(self, patterns_file='../data/regret_patterns.json'):
-        """Initialize matcher with pattern database"""
+        """Initialize matcher with sharded pattern database"""
         self.client = GeminiClient()
 
         
-        # Load patterns
-        with open(patterns_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            self.patterns = data['patterns']
+        # Load patterns, one shard per decision category
+        self.store = PatternStore(patterns_file).load()
+        
+        print(f"Loaded {len(self.store)} patterns in {len(self.store.categories())} shards")
+    
+    @property
+    def patterns(self):
+        """All loaded patterns across every shard"""
+        return self.store.all_patterns()
+    
+    def reload(self, categories=None):
+        """Reload the given category shards, or every shard if none are given"""
+        if categories is None:
+            self.store.load()
+        else:
+            for category in categories:
+                self.store.reload_shard(category)
+        
+        print(f"Reloaded {len(self.store)} patterns in {len(self.store.categories())} shards")
+    
+    def top_patterns_in_shard(self, shard_set, category, user_age, decision_category, context_words, limit):
+        """Top-k (score, position, pattern) entries from a single shard"""
+        scored = (
+            (score_pattern(pattern, user_age, decision_category, context_words), position, pattern)
+            for position, pattern in zip(shard_set.get_positions(category), shard_set.get_shard(category))
+        )
+        # Equal scores keep database order, as the original full sort did
+        return heapq.nlargest(limit, (item for item in scored if item[0] > 0), key=lambda x: (x[0], -x[1]))
+    
+    def shard_upper_bound(self, shard_set, category, user_age, context_words):
+        """Highest score any pattern outside the target category shard could reach"""
+        bounds = shard_set.bounds[category]
+        
+        age_score = 0
+        if bounds['min_age'] is not None:
+            if bounds['min_age'] <= user_age <= bounds['max_age']:
+                age_diff = 0
+            else:
+                age_diff = min(abs(bounds['min_age'] - user_age), abs(bounds['max_age'] - user_age))
+            if age_diff <= 10:
+                age_score = (10 - age_diff) * 2
         
-        print(f"Loaded {len(self.patterns)} patterns")
+        # No category bonus: only the target shard can match decision_category
+        return age_score + bounds['max_severity'] + len(context_words)
     
     def find_relevant_patterns(self, user_age, decision_category, situation_context, limit=20):
         """Find most relevant patterns based on user input"""
-        relevant = []
+        if limit <= 0:
+            return []
         
-        for pattern in self.patterns:
-            score = 0
-            
-            # Age similarity (within 10 years)
-            if pattern.get('age_when_decided'):
-                age_diff = abs(pattern['age_when_decided'] - user_age)
-                if age_diff <= 10:
-                    score += (10 - age_diff) * 2
-            
-            # Category match
-            if pattern.get('decision_category') == decision_category:
-                score += 20
-            
-            # Context similarity (simple keyword matching)
-            if situation_context:
-                context_lower = situation_context.lower()
-                pattern_context = pattern.get('situation_context', '').lower()
-                common_words = set(context_lower.split()) & set(pattern_context.split())
-                score += len(common_words)
-            
-            # Higher severity patterns are more relevant
-            if pattern.get('regret_severity'):
-                score += pattern['regret_severity']
-            
-            if score > 0:
-                relevant.append({
-                    'pattern': pattern,
-                    'relevance_score': score
-                })
+        context_words = set(situation_context.lower().split()) if situation_context else set()
+        rank_key = lambda x: (x[0], -x[1])
+        
+        # Query one snapshot throughout; reloads swap in a new one
+        shard_set = self.store.current
+        
+        # Score the target category shard first; it sets the bar the other shards must beat
+        target = normalize_category(decision_category)
+        relevant = self.top_patterns_in_shard(shard_set, target, user_age, decision_category, context_words, limit)
+        
+        others = [c for c in shard_set.categories() if c != target]
+        bounds = {c: self.shard_upper_bound(shard_set, c, user_age, context_words) for c in others}
+        for category in sorted(others, key=lambda c: bounds[c], reverse=True):
+            if len(relevant) == limit and bounds[category] < relevant[-1][0]:
+                # Shards are visited by descending bound, so no later shard can place either
+                break
+            candidates = self.top_patterns_in_shard(shard_set, category, user_age, decision_category, context_words, limit)
+            relevant = heapq.nlargest(limit, relevant + candidates, key=rank_key)
         
-        # Sort by relevance and return top matches
-        relevant.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return [r['pattern'] for r in relevant[:limit]]
+        return [pattern for _, _, pattern in relevant]
     
     def analyze_decision(self, user_input):
         """Analyze user's decision using Gemini and pattern database"""
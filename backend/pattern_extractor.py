@@ -1,6 +1,7 @@
 import json
 import os
 from gemini_client import GeminiClient
+from pattern_store import write_shards, default_shards_dir, source_signature
 from dotenv import load_dotenv
 import time
 
@@ -92,7 +93,7 @@ Be specific and extract actual details from the story. If information is not ava
         return patterns
     
     def save_patterns(self, patterns, filename='../data/regret_patterns.json'):
-        """Save extracted patterns to JSON file"""
+        """Save extracted patterns to JSON file and per-category shards"""
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         
         data = {
@@ -105,6 +106,9 @@ Be specific and extract actual details from the story. If information is not ava
             json.dump(data, f, indent=2, ensure_ascii=False)
         
         print(f"Saved {len(patterns)} patterns to {filename}")
+        
+        write_shards(patterns, default_shards_dir(filename), source_signature(filename))
+        
         return filename
 
 if __name__ == '__main__':
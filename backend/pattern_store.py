@@ -0,0 +1,293 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+DEFAULT_PATTERNS_FILE = '../data/regret_patterns.json'
+
+# Categories the extractor asks Gemini for; anything else is sharded as 'unknown'
+KNOWN_CATEGORIES = ('career', 'relationship', 'education', 'financial', 'health', 'lifestyle')
+UNKNOWN_CATEGORY = 'unknown'
+SHARD_CATEGORIES = KNOWN_CATEGORIES + (UNKNOWN_CATEGORY,)
+MANIFEST_FILENAME = 'manifest.json'
+
+
+def default_shards_dir(patterns_file):
+    """Shard directory that belongs to a monolithic patterns file"""
+    return os.path.join(os.path.dirname(patterns_file), 'shards')
+
+
+def normalize_category(category):
+    """Map a raw decision_category onto one of the fixed shard names"""
+    if isinstance(category, str):
+        category = category.strip().lower()
+        if category in KNOWN_CATEGORIES:
+            return category
+    return UNKNOWN_CATEGORY
+
+
+def shard_filename(shards_dir, category):
+    """Path of the shard file holding one decision category"""
+    if category not in SHARD_CATEGORIES:
+        raise ValueError(f"Not a shard category: {category!r}")
+    return os.path.join(shards_dir, f"{category}.json")
+
+
+def partition_patterns(patterns):
+    """Group patterns by normalized decision_category.
+
+    Returns (shards, positions): per-category pattern lists and, in step
+    with them, each pattern's index in the full database.
+    """
+    shards = {}
+    positions = {}
+    for position, pattern in enumerate(patterns):
+        category = normalize_category(pattern.get('decision_category'))
+        shards.setdefault(category, []).append(pattern)
+        positions.setdefault(category, []).append(position)
+    return shards, positions
+
+
+def source_signature(path):
+    """Size and mtime of the patterns file a set of shards was built from"""
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def load_shard_file(path):
+    """Load a single shard file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_manifest(shards_dir):
+    """Manifest of the last complete write_shards call, or None"""
+    path = os.path.join(shards_dir, MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file next to path, then move it into place"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_shards(patterns, shards_dir, source=None):
+    """Write patterns to one JSON file per decision category.
+
+    Every file of one call shares a generation id. The manifest is written
+    last, so it only ever names a complete generation. source is the
+    source_signature of the patterns file the shards were built from.
+    """
+    os.makedirs(shards_dir, exist_ok=True)
+    shards, positions = partition_patterns(patterns)
+    generation = uuid.uuid4().hex
+    extracted_at = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    for category, category_patterns in shards.items():
+        data = {
+            'extracted_at': extracted_at,
+            'generation': generation,
+            'category': category,
+            'total_patterns': len(category_patterns),
+            'positions': positions[category],
+            'patterns': category_patterns
+        }
+        write_json_atomic(shard_filename(shards_dir, category), data)
+
+    manifest = {
+        'extracted_at': extracted_at,
+        'generation': generation,
+        'source': source,
+        'total_patterns': len(patterns),
+        'categories': list(shards)
+    }
+    write_json_atomic(os.path.join(shards_dir, MANIFEST_FILENAME), manifest)
+
+    # Drop shards for categories that no longer have any patterns
+    for category in SHARD_CATEGORIES:
+        path = shard_filename(shards_dir, category)
+        if category not in shards and os.path.exists(path):
+            os.remove(path)
+
+    print(f"Saved {len(patterns)} patterns to {len(shards)} shards in {shards_dir}")
+    return manifest
+
+
+class ShardSet:
+    def __init__(self, generation, shards, positions):
+        """One consistent, read-only view of the loaded shards.
+
+        PatternStore swaps whole ShardSets in, so a reader holding one never
+        sees a half-loaded database.
+        """
+        self.generation = generation
+        self.shards = shards
+        self.positions = positions
+        self.bounds = {category: compute_bounds(patterns) for category, patterns in shards.items()}
+
+    def replace_shard(self, category, patterns, positions):
+        """New ShardSet with one category's shard replaced"""
+        shards = dict(self.shards)
+        shard_positions = dict(self.positions)
+        shards[category] = patterns
+        shard_positions[category] = positions
+        return ShardSet(self.generation, shards, shard_positions)
+
+    def categories(self):
+        """Names of all loaded category shards"""
+        return list(self.shards)
+
+    def get_shard(self, category):
+        """Patterns belonging to one category (empty list if unknown)"""
+        return self.shards.get(category, [])
+
+    def get_positions(self, category):
+        """Database positions of a shard's patterns, in step with get_shard"""
+        return self.positions.get(category, [])
+
+    def all_patterns(self):
+        """Flat list of every loaded pattern, in database order"""
+        entries = [
+            (position, pattern)
+            for category, patterns in self.shards.items()
+            for position, pattern in zip(self.positions[category], patterns)
+        ]
+        entries.sort(key=lambda x: x[0])
+        return [pattern for _, pattern in entries]
+
+    def __len__(self):
+        return sum(len(patterns) for patterns in self.shards.values())
+
+
+def compute_bounds(patterns):
+    """Age range and highest severity in a shard, for bounding match scores"""
+    ages = [p['age_when_decided'] for p in patterns if p.get('age_when_decided')]
+    severities = [p['regret_severity'] for p in patterns if p.get('regret_severity')]
+    return {
+        'min_age': min(ages) if ages else None,
+        'max_age': max(ages) if ages else None,
+        'max_severity': max(severities + [0])
+    }
+
+
+class PatternStore:
+    def __init__(self, patterns_file=DEFAULT_PATTERNS_FILE, shards_dir=None):
+        """Pattern database partitioned into per-category shards.
+
+        regret_patterns.json stays the source of truth; the shard files next
+        to it are rebuilt whenever their manifest does not match it.
+        """
+        self.patterns_file = patterns_file
+        self.shards_dir = shards_dir or default_shards_dir(patterns_file)
+        self.current = ShardSet(None, {}, {})
+        self.lock = threading.Lock()
+
+    def exists(self):
+        """Whether any pattern source is available to load"""
+        return os.path.exists(self.patterns_file) or load_manifest(self.shards_dir) is not None
+
+    def shards_stale(self, manifest=None):
+        """Whether the shard files need rebuilding from the patterns file"""
+        if not os.path.exists(self.patterns_file):
+            return False
+        manifest = manifest or load_manifest(self.shards_dir)
+        if manifest is None:
+            return True
+        return manifest['source'] != source_signature(self.patterns_file)
+
+    def load(self):
+        """Load every shard, rebuilding them first if they are stale"""
+        with self.lock:
+            self.current = self.build_shard_set()
+        return self
+
+    def build_shard_set(self):
+        """Read a complete ShardSet from the shard files or the patterns file"""
+        manifest = load_manifest(self.shards_dir)
+        if manifest is not None and not self.shards_stale(manifest):
+            shards = {}
+            positions = {}
+            for category in manifest['categories']:
+                data = load_shard_file(shard_filename(self.shards_dir, category))
+                if data['generation'] != manifest['generation']:
+                    break
+                shards[category] = data['patterns']
+                positions[category] = data['positions']
+            else:
+                return ShardSet(manifest['generation'], shards, positions)
+
+            # A shard from another generation: fall through and rebuild
+            if not os.path.exists(self.patterns_file):
+                raise ValueError(f"Shards in {self.shards_dir} are from mixed generations")
+
+        source = source_signature(self.patterns_file)
+        with open(self.patterns_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        shards, positions = partition_patterns(data['patterns'])
+
+        try:
+            generation = write_shards(data['patterns'], self.shards_dir, source)['generation']
+        except OSError as e:
+            # Read-only deploys still work from the in-memory partition
+            print(f"Could not write shards to {self.shards_dir}: {e}")
+            generation = None
+        return ShardSet(generation, shards, positions)
+
+    def reload_shard(self, category):
+        """Reload a single category shard without touching the others.
+
+        Positions are database-wide, so a shard is only reloaded on its own
+        when it belongs to the loaded generation; otherwise every shard is.
+        """
+        category = normalize_category(category)
+        with self.lock:
+            manifest = load_manifest(self.shards_dir)
+            if (self.shards_stale(manifest) or manifest is None
+                    or manifest['generation'] != self.current.generation):
+                self.current = self.build_shard_set()
+                return self
+
+            if category not in manifest['categories']:
+                return self
+
+            data = load_shard_file(shard_filename(self.shards_dir, category))
+            if data['generation'] != self.current.generation:
+                self.current = self.build_shard_set()
+            else:
+                self.current = self.current.replace_shard(category, data['patterns'], data['positions'])
+        return self
+
+    def categories(self):
+        """Names of all loaded category shards"""
+        return self.current.categories()
+
+    def get_shard(self, category):
+        """Patterns belonging to one category (empty list if unknown)"""
+        return self.current.get_shard(category)
+
+    def all_patterns(self):
+        """Flat list of every loaded pattern, in database order"""
+        return self.current.all_patterns()
+
+    def __len__(self):
+        return len(self.current)
+
+
+if __name__ == '__main__':
+    # Split the monolithic pattern database into per-category shards
+    with open(DEFAULT_PATTERNS_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    write_shards(data['patterns'], default_shards_dir(DEFAULT_PATTERNS_FILE), source_signature(DEFAULT_PATTERNS_FILE))
@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from matcher import RegretMatcher, score_pattern
+from pattern_store import KNOWN_CATEGORIES, load_manifest, source_signature, write_shards
+
+SAMPLE_PATTERNS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'regret_patterns.json')
+
+
+def linear_relevant_patterns(patterns, user_age, decision_category, situation_context, limit=20):
+    """Reference ranking: score every pattern and fully sort, as before sharding"""
+    context_words = set(situation_context.lower().split()) if situation_context else set()
+    relevant = []
+    for pattern in patterns:
+        score = score_pattern(pattern, user_age, decision_category, context_words)
+        if score > 0:
+            relevant.append((score, pattern))
+    relevant.sort(key=lambda x: x[0], reverse=True)
+    return [pattern for _, pattern in relevant[:limit]]
+
+
+def save_database(patterns_file, patterns):
+    """Write the monolithic file and its shards, as PatternExtractor.save_patterns does"""
+    with open(patterns_file, 'w', encoding='utf-8') as f:
+        json.dump({'patterns': patterns}, f)
+    write_shards(patterns, os.path.join(os.path.dirname(patterns_file), 'shards'), source_signature(patterns_file))
+
+
+@pytest.fixture
+def patterns():
+    with open(SAMPLE_PATTERNS_FILE, 'r', encoding='utf-8') as f:
+        sample = json.load(f)['patterns']
+
+    # Free-form categories must land in the 'unknown' shard
+    return sample + [
+        dict(sample[0], decision_category='career/education'),
+        dict(sample[1], decision_category='../escape')
+    ]
+
+
+@pytest.fixture
+def patterns_file(tmp_path, patterns):
+    path = tmp_path / 'regret_patterns.json'
+    path.write_text(json.dumps({'patterns': patterns}), encoding='utf-8')
+    return str(path)
+
+
+def test_shard_and_monolithic_loads_match_linear_scan(patterns_file, patterns):
+    # First load partitions the monolithic file, second load reads the shards it wrote
+    from_file = RegretMatcher(patterns_file)
+    from_shards = RegretMatcher(patterns_file)
+    assert not from_shards.store.shards_stale()
+    assert from_file.patterns == from_shards.patterns == patterns
+
+    context = 'stable job family money'
+    for matcher in (from_file, from_shards):
+        for user_age in range(16, 80, 3):
+            for category in KNOWN_CATEGORIES + ('unknown', 'career/education', 'other'):
+                for limit in (1, 2, 3, 5, 8, 13, 20, 40):
+                    expected = linear_relevant_patterns(patterns, user_age, category, context, limit)
+                    assert matcher.find_relevant_patterns(user_age, category, context, limit) == expected
+
+
+def test_free_form_categories_stay_inside_shards_dir(patterns_file, tmp_path):
+    raw_stories = tmp_path / 'raw_regret_stories.json'
+    raw_stories.write_text('{}', encoding='utf-8')
+
+    RegretMatcher(patterns_file)
+    write_shards([{'decision_category': 'health'}], str(tmp_path))
+
+    assert raw_stories.exists()
+    assert 'unknown' in load_manifest(str(tmp_path / 'shards'))['categories']
+    assert not (tmp_path / 'escape.json').exists()
+
+
+def test_reload_shard_after_database_update_reloads_everything(patterns_file, patterns):
+    matcher = RegretMatcher(patterns_file)
+
+    # Inserting at the front shifts every database position
+    updated = [dict(patterns[5], decision_made='Inserted pattern')] + patterns
+    save_database(patterns_file, updated)
+    matcher.reload(['career'])
+
+    assert matcher.patterns == updated
+    positions = [p for c in matcher.store.categories() for p in matcher.store.current.get_positions(c)]
+    assert sorted(positions) == list(range(len(updated)))
+    assert matcher.find_relevant_patterns(30, 'career', 'job', 40) == \
+        linear_relevant_patterns(updated, 30, 'career', 'job', 40)
+
+
+def test_reload_shard_of_same_generation_keeps_other_shards(patterns_file):
+    matcher = RegretMatcher(patterns_file)
+    health_shard = matcher.store.get_shard('health')
+
+    matcher.reload(['career'])
+
+    assert matcher.store.get_shard('health') is health_shard
+
+
+def test_backdated_patterns_file_rebuilds_shards(patterns_file, patterns):
+    RegretMatcher(patterns_file)
+
+    # Replace the file with different content and an older mtime, as cp -p or a restore would
+    replaced = patterns[:3]
+    before = os.stat(patterns_file).st_mtime - 3600
+    with open(patterns_file, 'w', encoding='utf-8') as f:
+        json.dump({'patterns': replaced}, f)
+    os.utime(patterns_file, (before, before))
+
+    matcher = RegretMatcher(patterns_file)
+    assert matcher.patterns == replaced
+    assert not matcher.store.shards_stale()
+
+
+def test_queries_during_reload_see_a_complete_database(patterns_file):
+    matcher = RegretMatcher(patterns_file)
+    queries = [(user_age, category) for user_age in (20, 35, 50) for category in KNOWN_CATEGORIES]
+    expected = {q: matcher.find_relevant_patterns(q[0], q[1], 'job money', 5) for q in queries}
+
+    mismatches = []
+    done = threading.Event()
+
+    def query():
+        while not done.is_set():
+            for q in queries:
+                if matcher.find_relevant_patterns(q[0], q[1], 'job money', 5) != expected[q]:
+                    mismatches.append(q)
+
+    # Switch threads often so the reader lands inside any reload window
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    reader = threading.Thread(target=query)
+    reader.start()
+    try:
+        for i in range(300):
+            if i % 10 == 0:
+                # Force a rebuild from the patterns file as well
+                os.utime(patterns_file)
+            if i % 2:
+                matcher.reload()
+            else:
+                matcher.reload(['career', 'health'])
+    finally:
+        done.set()
+        reader.join()
+        sys.setswitchinterval(switch_interval)
+
+    assert mismatches == []